@@ -1,25 +1,25 @@
 import os
 import numpy as np
-from PIL import Image
-import tensorflow as tf
-import keras
-from custom_layers import InstanceNormalization  # Import our custom layer
+from generators import get_generator
 from image_utils import tensor_to_image, image_to_base64, save_image
 
 # Get the absolute path to the Backend files directory
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
-MODELS_DIR = os.path.join(BACKEND_DIR, "models")
 
-def generate_cyclic_gan_cartoon(preprocessed_image=None):
+def generate_cartoon(model_name, preprocessed_image=None):
     """
-    Generate a cartoon image using the CyclicGAN model.
+    Generate a cartoon image using any generator in the models directory.
+    
+    Args:
+        model_name: Name of the generator (e.g. 'pix2pix' or 'cyclic_gan')
+        preprocessed_image: Tensor from preprocess_image_for_inference. Loaded from
+            preprocessed_image.npy when omitted.
     
     Returns:
-        tf.Tensor: The generated cartoon image
+        dict: The generated 'tensor', its 'base64' PNG and the 'pil_image'
         
     Raises:
-        FileNotFoundError: If the required files are not found
-        RuntimeError: If there's an error during model loading or inference
+        RuntimeError: If the files are not found or there's an error during model loading or inference
     """
     try:
         # Use provided tensor or load from disk
@@ -29,78 +29,35 @@ def generate_cyclic_gan_cartoon(preprocessed_image=None):
                 raise FileNotFoundError("Preprocessed image file not found. Run preprocess_image.py first.")
             preprocessed_image = np.load(preprocessed_path)
         
-        # Load cyclic gan model
-        model_path = os.path.join(MODELS_DIR, "cyclic_gan_generator_g_model.keras")
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"CyclicGAN model not found at {model_path}")
-            
-        # Load model with custom objects
-        custom_objects = {'InstanceNormalization': InstanceNormalization}
-        cyclic_gan_generator = keras.models.load_model(model_path, custom_objects=custom_objects)
-        
-        # Generate the cyclic gan image
-        cyclic_gan_image = cyclic_gan_generator(preprocessed_image)
+        # Generate the cartoon image with the cached generator (warmed up at server startup),
+        # at the generator's declared input size and back at the size of the input image
+        generator = get_generator(model_name, warm_up=False)
+        image_size = tuple(preprocessed_image.shape[1:3])
+        cartoon_image = generator.infer(generator.fit_input(preprocessed_image))
+        cartoon_image = generator.fit_output(cartoon_image, image_size)
         
         # Convert to PIL Image
-        pil_image = tensor_to_image(cyclic_gan_image)
+        pil_image = tensor_to_image(cartoon_image)
         
         # Convert to base64 for web display
         base64_image = image_to_base64(pil_image, format='PNG')
         
         return {
-            'tensor': cyclic_gan_image,
+            'tensor': cartoon_image,
             'base64': base64_image,
             'pil_image': pil_image
         }
         
     except Exception as e:
-        raise RuntimeError(f"Error generating CyclicGAN cartoon: {str(e)}")
+        raise RuntimeError(f"Error generating {model_name} cartoon: {str(e)}")
+
+def generate_cyclic_gan_cartoon(preprocessed_image=None):
+    """Generate a cartoon image using the CyclicGAN model. See generate_cartoon."""
+    return generate_cartoon("cyclic_gan", preprocessed_image)
 
 def generate_pix2pix_cartoon(preprocessed_image=None):
-    """
-    Generate a cartoon image using the Pix2Pix model.
-    
-    Returns:
-        tf.Tensor: The generated cartoon image
-        
-    Raises:
-        FileNotFoundError: If the required files are not found
-        RuntimeError: If there's an error during model loading or inference
-    """
-    try:
-        # Use provided tensor or load from disk
-        if preprocessed_image is None:
-            preprocessed_path = os.path.join(BACKEND_DIR, "preprocessed_image.npy")
-            if not os.path.exists(preprocessed_path):
-                raise FileNotFoundError("Preprocessed image file not found. Run preprocess_image.py first.")
-            preprocessed_image = np.load(preprocessed_path)
-        
-        # Load pix2pix model
-        model_path = os.path.join(MODELS_DIR, "pix2pix_generator_model.keras")
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Pix2Pix model not found at {model_path}")
-            
-        # Load model with custom objects
-        custom_objects = {'InstanceNormalization': InstanceNormalization}
-        pix2pix_generator = keras.models.load_model(model_path, custom_objects=custom_objects)
-        
-        # Generate the pix2pix image
-        pix2pix_image = pix2pix_generator(preprocessed_image)
-        
-        # Convert to PIL Image
-        pil_image = tensor_to_image(pix2pix_image)
-        
-        # Convert to base64 for web display
-        base64_image = image_to_base64(pil_image, format='PNG')
-        
-        return {
-            'tensor': pix2pix_image,
-            'base64': base64_image,
-            'pil_image': pil_image
-        }
-        
-    except Exception as e:
-        raise RuntimeError(f"Error generating Pix2Pix cartoon: {str(e)}")
+    """Generate a cartoon image using the Pix2Pix model. See generate_cartoon."""
+    return generate_cartoon("pix2pix", preprocessed_image)
 
 # Test the functions
 if __name__ == "__main__":
@@ -0,0 +1,371 @@
+import os
+import copy
+import time
+import shutil
+import argparse
+import subprocess
+import numpy as np
+from PIL import Image
+from generators import get_generator
+
+# OpenCV is optional; without it frames are decoded/encoded with the ffmpeg binary
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Image extensions recognised when reading or writing a frame-sequence directory
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Frames are subsampled by this stride when comparing them, which is plenty to
+# detect a near-identical frame and keeps the comparison cheap
+DIFF_STRIDE = 4
+
+def select_backend(backend='auto'):
+    """
+    Pick the video decoding/encoding backend.
+
+    Args:
+        backend: 'auto', 'opencv' or 'ffmpeg'
+
+    Returns:
+        str: 'opencv' or 'ffmpeg'
+
+    Raises:
+        RuntimeError: If the requested backend is not available
+    """
+    if backend == 'auto':
+        if cv2 is not None:
+            return 'opencv'
+        backend = 'ffmpeg'
+    if backend == 'opencv' and cv2 is None:
+        raise RuntimeError("OpenCV backend requested but opencv-python is not installed.")
+    if backend == 'ffmpeg' and (shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None):
+        raise RuntimeError("ffmpeg backend requested but ffmpeg/ffprobe were not found on PATH.")
+    if backend not in ('opencv', 'ffmpeg'):
+        raise ValueError(f"Unknown video backend: {backend}. Use 'auto', 'opencv' or 'ffmpeg'.")
+    return backend
+
+def _probe_video_ffmpeg(video_path):
+    """Return (width, height, fps) of the first video stream using ffprobe."""
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height,r_frame_rate', '-of', 'csv=p=0', video_path],
+        check=True, capture_output=True, text=True).stdout.strip()
+    width, height, rate = output.split(',')[:3]
+    numerator, _, denominator = rate.partition('/')
+    fps = float(numerator) / float(denominator or 1)
+    return int(width), int(height), fps
+
+def _iter_frames_opencv(capture):
+    """Yield RGB uint8 frames from an opened cv2.VideoCapture."""
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+def _iter_frames_ffmpeg(video_path, width, height):
+    """Yield RGB uint8 frames decoded by an ffmpeg subprocess."""
+    frame_size = width * height * 3
+    process = subprocess.Popen(
+        ['ffmpeg', '-v', 'error', '-i', video_path, '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'],
+        stdout=subprocess.PIPE)
+    try:
+        while True:
+            buffer = process.stdout.read(frame_size)
+            if len(buffer) < frame_size:
+                break
+            yield np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+        # End of output: a corrupt or truncated input shows up as a non-zero exit status
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {video_path}")
+    finally:
+        process.stdout.close()
+        # Only still running when the consumer stopped reading early
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+def _iter_frames_directory(frames_dir):
+    """Yield RGB uint8 frames from the images of a directory, in file name order."""
+    for name in sorted(os.listdir(frames_dir)):
+        if name.lower().endswith(FRAME_EXTENSIONS):
+            with Image.open(os.path.join(frames_dir, name)) as image:
+                yield np.array(image.convert("RGB"))
+
+class FrameSource:
+    """
+    Iterable of RGB uint8 frames that owns the decoder they come from.
+
+    close() releases the decoder even if iteration never started, which closing
+    the frame generator alone does not do.
+    """
+
+    def __init__(self, fps, frames, release=None):
+        self.fps = fps
+        self._frames = frames
+        self._release = release
+
+    def __iter__(self):
+        return self._frames
+
+    def close(self):
+        self._frames.close()
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+def open_frame_source(input_path, backend='auto', fps=None):
+    """
+    Open a video file or a directory of frames for streaming.
+
+    Args:
+        input_path: Path to a local video file or a directory of PNG/JPEG frames
+        backend: Video backend for files ('auto', 'opencv' or 'ffmpeg')
+        fps: Frame rate to assume for frame directories (defaults to 30)
+
+    Returns:
+        FrameSource: The frames, of shape (height, width, 3), and their frame rate
+
+    Raises:
+        FileNotFoundError: If the input does not exist
+        RuntimeError: If the video cannot be opened
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Video input not found: {input_path}")
+
+    if os.path.isdir(input_path):
+        return FrameSource(fps or 30.0, _iter_frames_directory(input_path))
+
+    if select_backend(backend) == 'opencv':
+        capture = cv2.VideoCapture(input_path)
+        if not capture.isOpened():
+            raise RuntimeError(f"Could not open video: {input_path}")
+        return FrameSource(capture.get(cv2.CAP_PROP_FPS) or 30.0, _iter_frames_opencv(capture),
+                           capture.release)
+
+    # The ffmpeg process is only started once iteration begins
+    width, height, video_fps = _probe_video_ffmpeg(input_path)
+    return FrameSource(video_fps, _iter_frames_ffmpeg(input_path, width, height))
+
+class FrameWriter:
+    """
+    Write RGB uint8 frames to a video file or to a directory of PNG frames.
+
+    The underlying encoder is opened on the first frame, once its size is known.
+    Every frame written to a video must have the size of the first one.
+    """
+
+    def __init__(self, output_path, fps, backend='auto'):
+        self.output_path = output_path
+        self.fps = fps
+        self.to_directory = not os.path.splitext(output_path)[1]
+        self.backend = None if self.to_directory else select_backend(backend)
+        self.count = 0
+        self.frame_shape = None
+        self._writer = None
+        self._process = None
+
+    def _open(self, width, height):
+        if self.to_directory:
+            os.makedirs(self.output_path, exist_ok=True)
+        elif self.backend == 'opencv':
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            self._writer = cv2.VideoWriter(self.output_path, fourcc, self.fps, (width, height))
+            if not self._writer.isOpened():
+                raise RuntimeError(f"Could not open video writer for {self.output_path}")
+        else:
+            self._process = subprocess.Popen(
+                ['ffmpeg', '-v', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                 # yuv420p needs even dimensions, so odd sizes get a 1 pixel pad
+                 '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                 '-c:v', 'libx264', '-pix_fmt', 'yuv420p', self.output_path],
+                stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        if self.count == 0:
+            self._open(frame.shape[1], frame.shape[0])
+            self.frame_shape = frame.shape
+        elif not self.to_directory and frame.shape != self.frame_shape:
+            raise ValueError(f"Frame {self.count} has shape {frame.shape}, but the video was "
+                             f"started with frames of shape {self.frame_shape}")
+        if self.to_directory:
+            Image.fromarray(frame).save(os.path.join(self.output_path, f"frame_{self.count:06d}.png"))
+        elif self._writer is not None:
+            self._writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        else:
+            self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        self.count += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass  # The encoder already exited; its exit status is checked below
+            finally:
+                returncode = self._process.wait()
+            if returncode != 0:
+                raise RuntimeError(f"ffmpeg failed to encode {self.output_path}")
+
+def cartoonize_frames(frames, generator, batch_size=4, diff_threshold=2.0,
+                      max_buffered_frames=64, stats=None):
+    """
+    Cartoonize a stream of frames, reusing the previous result for near-identical frames.
+
+    Each frame is compared with the last frame that was sent to the generator. When
+    the mean absolute pixel difference (0-255 scale) is below diff_threshold the
+    cartoon of that frame is reused instead of running inference again. Comparing
+    against the last inferred frame rather than the immediately preceding one stops
+    slow drift from being reused indefinitely. Frames that need inference are
+    batched, and at most max_buffered_frames are held before being emitted.
+
+    Args:
+        frames: Iterable of RGB uint8 frames of shape (height, width, 3)
+        generator: A CartoonGenerator (see generators.py)
+        batch_size: Number of frames per generator call
+        diff_threshold: Mean absolute difference below which a frame is reused (0 disables reuse)
+        max_buffered_frames: Maximum number of frames waiting for their cartoon
+        stats: Optional dict updated with 'frames', 'inferred_frames' and 'reused_frames'
+
+    Yields:
+        np.ndarray: The cartoon frames, in input order and at the input size
+    """
+    if batch_size <= 0 or max_buffered_frames <= 0:
+        raise ValueError(f"Invalid batching: batch_size={batch_size}, max_buffered_frames={max_buffered_frames}")
+    if stats is None:
+        stats = {}
+    stats.update({'frames': 0, 'inferred_frames': 0, 'reused_frames': 0})
+
+    key_frames = []    # frames waiting for inference
+    pending = []       # for each buffered frame, its index in key_frames (-1 means last_output)
+    reference = None   # subsampled copy of the last frame sent to inference
+    last_output = None # cartoon of the last inferred frame
+
+    for frame in frames:
+        small = frame[::DIFF_STRIDE, ::DIFF_STRIDE].astype(np.int16)
+        if (reference is not None and small.shape == reference.shape
+                and np.mean(np.abs(small - reference)) < diff_threshold):
+            stats['reused_frames'] += 1
+        else:
+            reference = small
+            key_frames.append(frame)
+            stats['inferred_frames'] += 1
+        pending.append(len(key_frames) - 1)
+        stats['frames'] += 1
+
+        if len(key_frames) >= batch_size or len(pending) >= max_buffered_frames:
+            outputs = generator.cartoonize(key_frames) if key_frames else []
+            for index in pending:
+                yield outputs[index] if index >= 0 else last_output
+            if outputs:
+                last_output = outputs[-1]
+            key_frames, pending = [], []
+
+    if pending:
+        outputs = generator.cartoonize(key_frames) if key_frames else []
+        for index in pending:
+            yield outputs[index] if index >= 0 else last_output
+
+def cartoonize_video(input_path, output_path, model_name="pix2pix", batch_size=4,
+                     diff_threshold=2.0, backend='auto', fps=None, device=None, input_size=None,
+                     max_buffered_frames=64):
+    """
+    Cartoonize a local video file or frame directory with one of the generator models.
+
+    Frames are streamed from the input, cartoonized in batches and streamed to the
+    output, so memory use does not grow with the length of the clip.
+
+    Args:
+        input_path: Path to a video file or a directory of PNG/JPEG frames
+        output_path: Path of the output video, or a directory (no extension) for PNG frames
+        model_name: Generator to use (any name from generators.discover_generators)
+        batch_size: Number of frames per generator call
+        diff_threshold: Mean absolute difference below which a frame reuses the previous cartoon
+        backend: Video backend ('auto', 'opencv' or 'ffmpeg')
+        fps: Frame rate of a frame directory input (video files keep their own rate)
+        device: Optional TensorFlow device string for inference, e.g. '/GPU:0'
+        input_size: Optional (height, width) overriding the generator's declared input
+            size, e.g. to run a long clip at a lower resolution for speed
+        max_buffered_frames: Maximum number of decoded frames held in memory at once
+
+    Returns:
+        dict: 'output_path', 'frames', 'inferred_frames', 'reused_frames', 'seconds' and 'fps'
+
+    Raises:
+        RuntimeError: If there's an error while decoding, inferring or encoding
+    """
+    try:
+        generator = get_generator(model_name, device=device)
+        if input_size is not None:
+            # Shallow copy so the cached generator keeps its declared size; the model is shared
+            generator = copy.copy(generator)
+            generator.input_size = tuple(input_size)
+        source = open_frame_source(input_path, backend, fps)
+
+        stats = {}
+        start = time.perf_counter()
+        writer = None
+        try:
+            writer = FrameWriter(output_path, source.fps, backend)
+            for frame in cartoonize_frames(source, generator, batch_size, diff_threshold,
+                                           max_buffered_frames, stats):
+                writer.write(frame)
+        except Exception:
+            # Clean up without letting a close error hide the original one
+            source.close()
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            raise
+        source.close()
+        writer.close()
+        seconds = time.perf_counter() - start
+
+        stats.update({
+            'output_path': output_path,
+            'seconds': seconds,
+            'fps': stats['frames'] / seconds if seconds > 0 else 0.0
+        })
+        return stats
+
+    except Exception as e:
+        raise RuntimeError(f"Error cartoonizing video: {str(e)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cartoonize a video file or a directory of frames.")
+    parser.add_argument("input", help="Video file or directory of PNG/JPEG frames")
+    parser.add_argument("output", help="Output video file, or a directory for PNG frames")
+    parser.add_argument("--model", default="pix2pix", help="Generator name from the models directory")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--diff-threshold", type=float, default=2.0,
+                        help="Mean pixel difference (0-255) below which the previous cartoon is reused; 0 disables reuse")
+    parser.add_argument("--backend", default="auto", choices=["auto", "opencv", "ffmpeg"])
+    parser.add_argument("--fps", type=float, default=None, help="Frame rate of a frame directory input (video files keep their own)")
+    parser.add_argument("--size", type=int, default=None,
+                        help="Run the generator at SIZE x SIZE instead of its declared input size "
+                             "(set per model with \"input_size\" in a JSON sidecar next to the model file)")
+    parser.add_argument("--max-buffered-frames", type=int, default=64,
+                        help="Maximum number of decoded frames held in memory at once")
+    parser.add_argument("--device", default=None, help="TensorFlow device for inference, e.g. /GPU:0")
+    args = parser.parse_args()
+
+    try:
+        result = cartoonize_video(args.input, args.output, args.model, args.batch_size,
+                                  args.diff_threshold, args.backend, args.fps, args.device,
+                                  (args.size, args.size) if args.size else None,
+                                  args.max_buffered_frames)
+        print(f"Cartoonized {result['frames']} frames ({result['inferred_frames']} inferred, "
+              f"{result['reused_frames']} reused) in {result['seconds']:.1f}s "
+              f"({result['fps']:.2f} frames/sec) -> {result['output_path']}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
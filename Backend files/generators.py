@@ -0,0 +1,324 @@
+import os
+import re
+import json
+from abc import ABC, abstractmethod
+import numpy as np
+import tensorflow as tf
+import keras
+from custom_layers import InstanceNormalization  # Import our custom layer
+
+# Get the absolute path to the Backend files directory
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BACKEND_DIR, "models")
+
+# Suffixes recognised as generator files in the models directory
+KERAS_MODEL_SUFFIX = ".keras"
+WEIGHTS_SUFFIX = ".weights.h5"
+
+# Trailing "_generator_model" / "_generator_<letter>_model" / "_model" parts of file names
+NAME_SUFFIX_PATTERN = re.compile(r"_generator(?:_([a-z]))?(?:_model)?$|_model$")
+
+# Keys a JSON sidecar may set; weights-only checkpoints can also pick an architecture
+SIDECAR_KEYS = {"name", "input_size", "value_range", "resize_method", "output_resize_method"}
+WEIGHTS_SIDECAR_KEYS = SIDECAR_KEYS | {"architecture"}
+
+# Loaded (and warmed up) generators, shared by every caller in the process
+_LOADED_GENERATORS = {}
+
+# Discovery warnings already printed; the models directory is rescanned on every lookup
+_PRINTED_WARNINGS = set()
+
+def _warn_once(message):
+    if message not in _PRINTED_WARNINGS:
+        _PRINTED_WARNINGS.add(message)
+        print(f"Warning: {message}")
+
+def _build_unet_instancenorm(output_channels=3):
+    """U-Net generator used by the CycleGAN notebook (tensorflow_examples pix2pix)."""
+    try:
+        from tensorflow_examples.models.pix2pix import pix2pix
+    except ImportError:
+        raise RuntimeError("Weights-only checkpoints need tensorflow_examples: "
+                           "pip install git+https://github.com/tensorflow/examples.git")
+    return pix2pix.unet_generator(output_channels, norm_type='instancenorm')
+
+# Architectures weights-only checkpoints can be rebuilt with
+ARCHITECTURES = {
+    "unet_instancenorm": _build_unet_instancenorm,
+}
+
+def generator_name(stem):
+    """
+    Derive a generator name from a model file name without its suffix.
+
+    pix2pix_generator_model is served as "pix2pix". CycleGAN exports keep their
+    direction letter, except for the photo-to-cartoon generator G:
+    cyclic_gan_generator_g_model is "cyclic_gan" and cyclic_gan_generator_f_model
+    is "cyclic_gan_f".
+    """
+    match = NAME_SUFFIX_PATTERN.search(stem)
+    if match is None or match.start() == 0:
+        return stem
+    name = stem[:match.start()]
+    direction = match.group(1)
+    if direction and direction != 'g':
+        name = f"{name}_{direction}"
+    return name
+
+class CartoonGenerator(ABC):
+    """
+    Base class for a cartoon generator model.
+
+    Subclasses implement _load_model(). Every generator declares the input
+    resolution and value range it expects; infer() takes and returns batches in
+    [-1, 1] (the range produced by preprocess_image_for_inference) and converts
+    to and from the model's own value range.
+
+    Args:
+        name: Name the generator is registered under
+        path: Path to the model file
+        input_size: (height, width) the model expects, or None to infer it from the model
+        value_range: (low, high) range of the model's inputs and outputs
+        resize_method: tf.image.resize method used to bring images to input_size
+        output_resize_method: tf.image.resize method used to resize results back
+        device: Optional TensorFlow device string, e.g. '/GPU:0' or '/CPU:0'
+    """
+
+    default_input_size = (1024, 1024)
+
+    def __init__(self, name, path, input_size=None, value_range=(-1.0, 1.0),
+                 resize_method='nearest', output_resize_method='bilinear', device=None):
+        self.name = name
+        self.path = path
+        self.input_size = tuple(input_size) if input_size else None
+        self.value_range = tuple(value_range)
+        self.resize_method = resize_method
+        self.output_resize_method = output_resize_method
+        self.device = device
+        self.model = None
+
+    @abstractmethod
+    def _load_model(self):
+        """Build or load the underlying keras.Model."""
+
+    def load(self):
+        """Load the model from disk if it is not loaded yet and return self."""
+        if self.model is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"{self.name} model not found at {self.path}")
+            if self.device:
+                with tf.device(self.device):
+                    self.model = self._load_model()
+            else:
+                self.model = self._load_model()
+            if self.input_size is None:
+                shape = self.model.input_shape
+                known = shape[1] is not None and shape[2] is not None
+                self.input_size = (shape[1], shape[2]) if known else self.default_input_size
+        return self
+
+    def warm_up(self):
+        """Run one dummy batch so graph tracing and allocation happen before the first request."""
+        self.load()
+        height, width = self.input_size
+        self.infer(np.zeros((1, height, width, 3), dtype=np.float32))
+        return self
+
+    def infer(self, batch):
+        """
+        Run the generator on a batch.
+
+        Args:
+            batch: Tensor or array of shape (batch, height, width, 3) with values in [-1, 1]
+
+        Returns:
+            tf.Tensor: The generated batch with values in [-1, 1]
+        """
+        self.load()
+        low, high = self.value_range
+        batch = tf.convert_to_tensor(batch, dtype=tf.float32)
+        batch = (batch + 1) * ((high - low) / 2) + low
+        if self.device:
+            with tf.device(self.device):
+                output = self.model(batch, training=False)
+        else:
+            output = self.model(batch, training=False)
+        return (output - low) * (2 / (high - low)) - 1
+
+    def fit_input(self, batch):
+        """Resize a batch (or single image) to the generator's input size if it differs."""
+        self.load()
+        batch = tf.convert_to_tensor(batch, dtype=tf.float32)
+        if tuple(batch.shape[-3:-1]) == self.input_size:
+            return batch
+        return tf.image.resize(batch, self.input_size, method=self.resize_method, antialias=True)
+
+    def fit_output(self, batch, size):
+        """Resize a generated batch (or single image) to size (height, width) if it differs."""
+        if tuple(batch.shape[-3:-1]) == tuple(size):
+            return batch
+        return tf.image.resize(batch, size, method=self.output_resize_method, antialias=True)
+
+    def preprocess(self, images):
+        """
+        Turn RGB uint8 images into a [-1, 1] batch at the generator's input size.
+
+        By default uses the same nearest neighbor resize as preprocess_image_for_inference.
+        """
+        batch = tf.stack([self.fit_input(image) for image in images])
+        return (batch / 127.5) - 1
+
+    def postprocess(self, batch, sizes):
+        """Turn a [-1, 1] batch back into RGB uint8 images of the given (height, width) sizes."""
+        images = []
+        for image, size in zip(batch, sizes):
+            image = self.fit_output(image, size)
+            images.append(np.clip((image.numpy() + 1) * 127.5, 0, 255).astype(np.uint8))
+        return images
+
+    def cartoonize(self, images):
+        """Cartoonize a list of RGB uint8 images in one batch, keeping each image's size."""
+        batch = self.preprocess(images)
+        return self.postprocess(self.infer(batch), [image.shape[:2] for image in images])
+
+class KerasModelGenerator(CartoonGenerator):
+    """Generator saved as a full `.keras` model."""
+
+    def _load_model(self):
+        # Load model with custom objects
+        custom_objects = {'InstanceNormalization': InstanceNormalization}
+        return keras.models.load_model(self.path, custom_objects=custom_objects)
+
+class WeightsCheckpointGenerator(CartoonGenerator):
+    """
+    Generator saved as a weights-only `.weights.h5` checkpoint.
+
+    The architecture is rebuilt from ARCHITECTURES before the weights are loaded.
+    """
+
+    default_input_size = (256, 256)
+
+    def __init__(self, name, path, architecture="unet_instancenorm", **kwargs):
+        super(WeightsCheckpointGenerator, self).__init__(name, path, **kwargs)
+        if architecture not in ARCHITECTURES:
+            raise ValueError(f"Unknown architecture: {architecture}. Use one of {list(ARCHITECTURES)}.")
+        self.architecture = architecture
+
+    def _load_model(self):
+        model = ARCHITECTURES[self.architecture]()
+        model.load_weights(self.path)
+        return model
+
+def generator_from_file(path, device=None):
+    """
+    Create an (unloaded) generator for a model file.
+
+    An optional JSON file next to the model with the same base name (for example
+    pix2pix_generator_model.json) can set "name", "input_size", "value_range",
+    "resize_method", "output_resize_method" and, for weights-only checkpoints,
+    "architecture".
+
+    Args:
+        path: Path to a `.keras` model or a `.weights.h5` checkpoint
+        device: Optional TensorFlow device string
+
+    Returns:
+        CartoonGenerator: The generator, or None if the file is not a generator file
+
+    Raises:
+        ValueError: If the JSON sidecar is invalid or sets an unsupported key
+    """
+    file_name = os.path.basename(path)
+    if file_name.endswith(KERAS_MODEL_SUFFIX):
+        stem, generator_class = file_name[:-len(KERAS_MODEL_SUFFIX)], KerasModelGenerator
+        allowed_keys = SIDECAR_KEYS
+    elif file_name.endswith(WEIGHTS_SUFFIX):
+        stem, generator_class = file_name[:-len(WEIGHTS_SUFFIX)], WeightsCheckpointGenerator
+        allowed_keys = WEIGHTS_SIDECAR_KEYS
+    else:
+        return None
+
+    options = {}
+    config_path = os.path.join(os.path.dirname(path), stem + ".json")
+    if os.path.exists(config_path):
+        try:
+            with open(config_path) as config_file:
+                options = json.load(config_file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {config_path}: {str(e)}")
+        if not isinstance(options, dict):
+            raise ValueError(f"{config_path} must contain a JSON object")
+        unknown = sorted(set(options) - allowed_keys)
+        if unknown:
+            raise ValueError(f"Unsupported keys {unknown} in {config_path}. "
+                             f"Allowed keys for {file_name}: {sorted(allowed_keys)}")
+
+    name = options.pop("name", None) or generator_name(stem)
+    return generator_class(name, path, device=device, **options)
+
+def discover_generators(models_dir=MODELS_DIR, device=None):
+    """
+    Find the generators available in a models directory.
+
+    Any `.keras` model or `.weights.h5` checkpoint dropped into the directory is
+    picked up. When two files map to the same name, the first in file name order
+    is kept and a warning is printed for the other. A file whose generator cannot
+    be created (for example because of a bad JSON sidecar) is skipped with a warning.
+
+    Args:
+        models_dir: Directory to scan
+        device: Optional TensorFlow device string for the generators
+
+    Returns:
+        dict: Generator name -> unloaded CartoonGenerator
+    """
+    generators = {}
+    if not os.path.isdir(models_dir):
+        return generators
+    for file_name in sorted(os.listdir(models_dir)):
+        try:
+            generator = generator_from_file(os.path.join(models_dir, file_name), device)
+        except Exception as e:
+            _warn_once(f"ignoring {os.path.join(models_dir, file_name)}: {str(e)}")
+            continue
+        if generator is None:
+            continue
+        if generator.name in generators:
+            _warn_once(f"ignoring {generator.path}, the name '{generator.name}' is already "
+                       f"used by {generators[generator.name].path}. Set \"name\" in a JSON sidecar to serve both.")
+            continue
+        generators[generator.name] = generator
+    return generators
+
+def get_generator(name, models_dir=MODELS_DIR, device=None, warm_up=True):
+    """
+    Get a loaded generator by name, loading and warming it up on first use.
+
+    Generators are cached per process, so every caller shares one copy of each model.
+
+    Args:
+        name: Generator name (see discover_generators)
+        models_dir: Directory to look for the model in
+        device: Optional TensorFlow device string, e.g. '/GPU:0'
+        warm_up: Whether to run a dummy batch after loading
+
+    Returns:
+        CartoonGenerator: The loaded generator
+
+    Raises:
+        ValueError: If no generator with that name exists
+    """
+    key = (name, models_dir, device)
+    if key not in _LOADED_GENERATORS:
+        generators = discover_generators(models_dir, device)
+        if name not in generators:
+            raise ValueError(f"Unknown model: {name}. Available models: {sorted(generators)}")
+        generator = generators[name].load()
+        if warm_up:
+            generator.warm_up()
+        _LOADED_GENERATORS[key] = generator
+    return _LOADED_GENERATORS[key]
+
+if __name__ == "__main__":
+    for name, generator in discover_generators().items():
+        print(f"{name}: {type(generator).__name__} ({generator.path})")
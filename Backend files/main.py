@@ -11,19 +11,38 @@ from io import BytesIO
 from PIL import Image
 import numpy as np
 from typing import Optional, List, Dict
+from contextlib import asynccontextmanager
 
 from preprocess_image import preprocess_image_for_inference
-from generate_images import generate_cyclic_gan_cartoon, generate_pix2pix_cartoon
+from generate_images import generate_cartoon, generate_cyclic_gan_cartoon, generate_pix2pix_cartoon
+from generators import discover_generators, get_generator
 from image_utils import array_to_base64
 
 # Get the absolute path to the Backend files directory
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up every servable generator once at startup instead of inside the first request."""
+    try:
+        names = list(discover_generators())
+    except Exception as e:
+        print(f"Could not list generators: {str(e)}")
+        names = []
+    for name in names:
+        try:
+            get_generator(name)
+            print(f"Loaded and warmed up generator: {name}")
+        except Exception as e:
+            print(f"Could not load generator {name}: {str(e)}")
+    yield
+
 # Create FastAPI app
 app = FastAPI(
     title="CartoonGAN API",
     description="API for converting photos to cartoon-style images using GAN models",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -43,8 +62,31 @@ class Base64Image(BaseModel):
 class CartoonResponse(BaseModel):
     pix2pix_image: Optional[str] = None
     cyclic_gan_image: Optional[str] = None
+    images: Dict[str, str] = {}
     message: str
 
+def validate_models(models: Optional[List[str]]) -> List[str]:
+    """Check requested model names against the generators in the models directory."""
+    # Defensive: ensure models is a list
+    models = models if models is not None else ["pix2pix", "cyclic_gan"]
+    available = discover_generators()
+    unknown = [name for name in models if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown models: {unknown}. Available models: {sorted(available)}")
+    return models
+
+def cartoonize_with_models(preprocessed_image, models: List[str]) -> Dict:
+    """Run every requested model and build a CartoonResponse body."""
+    response = {"message": "Success", "pix2pix_image": None, "cyclic_gan_image": None, "images": {}}
+    for name in models:
+        result = generate_cartoon(name, preprocessed_image)
+        response["images"][name] = result["base64"]
+        # Keep the original fields for existing clients
+        if name in ("pix2pix", "cyclic_gan"):
+            response[f"{name}_image"] = result["base64"]
+    return response
+
 def process_base64_image(base64_string: str) -> np.ndarray:
     """Convert base64 image to preprocessed tensor."""
     try:
@@ -98,25 +140,16 @@ async def cartoonize_base64(request: Base64Image):
     Convert a base64 encoded image to cartoon style.
     
     - **image**: Base64 encoded image string (with or without data URL prefix)
-    - **models**: List of models to use (default: ["pix2pix", "cyclic_gan"])
+    - **models**: List of models to use (default: ["pix2pix", "cyclic_gan"]), any name from `/models`
     
-    Returns cartoon versions from specified models.
+    Returns cartoon versions from specified models, keyed by model name in `images`.
     """
+    models = validate_models(request.models)
     try:
         # Process the base64 image
         preprocessed_image = process_base64_image(request.image)
         
-        response = {"message": "Success", "pix2pix_image": None, "cyclic_gan_image": None}
-        
-        # Defensive: ensure models is a list
-        models = request.models if request.models is not None else ["pix2pix", "cyclic_gan"]
-        if "pix2pix" in models:
-            result = generate_pix2pix_cartoon(preprocessed_image)
-            response["pix2pix_image"] = result["base64"]
-        if "cyclic_gan" in models:
-            result = generate_cyclic_gan_cartoon(preprocessed_image)
-            response["cyclic_gan_image"] = result["base64"]
-        return response
+        return cartoonize_with_models(preprocessed_image, models)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -130,29 +163,20 @@ async def cartoonize_upload(
     Convert an uploaded image to cartoon style.
     
     - **file**: The image file to convert
-    - **models**: List of models to use (default: ["pix2pix", "cyclic_gan"])
+    - **models**: List of models to use (default: ["pix2pix", "cyclic_gan"]), any name from `/models`
     
-    Returns cartoon versions from specified models.
+    Returns cartoon versions from specified models, keyed by model name in `images`.
     """
+    models = validate_models(models)
     try:
         # Validate file type
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
             
         # Process the uploaded file
-        preprocessed_image = process_upload_file(file)
-        
-        response = {"message": "Success", "pix2pix_image": None, "cyclic_gan_image": None}
+        preprocessed_image = await process_upload_file(file)
         
-        # Defensive: ensure models is a list
-        models = models if models is not None else ["pix2pix", "cyclic_gan"]
-        if "pix2pix" in models:
-            result = generate_pix2pix_cartoon(preprocessed_image)
-            response["pix2pix_image"] = result["base64"]
-        if "cyclic_gan" in models:
-            result = generate_cyclic_gan_cartoon(preprocessed_image)
-            response["cyclic_gan_image"] = result["base64"]
-        return response
+        return cartoonize_with_models(preprocessed_image, models)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -229,6 +253,47 @@ async def generate_cyclic_cartoon_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/generate_cartoon/{model_name}")
+async def generate_model_cartoon_endpoint(
+    model_name: str,
+    file: UploadFile = File(...),
+    description: Optional[str] = None
+):
+    """
+    Convert an uploaded image to cartoon style using any model from `/models`.
+    
+    - **model_name**: Name of the model to use
+    - **file**: The image file to convert
+    - **description**: Optional description of the image (for logging)
+    
+    Returns cartoon version in base64 format.
+    """
+    validate_models([model_name])
+    try:
+        print(f"Processing {model_name} request for: {description or file.filename}")
+        
+        # Validate file type
+        if not file.content_type or not file.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="File must be an image")
+            
+        # Process the uploaded file
+        preprocessed_image = await process_upload_file(file)
+        
+        result = generate_cartoon(model_name, preprocessed_image)
+        
+        return {
+            "cartoonImage": result["base64"],
+            "message": "Success"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/models")
+async def list_models():
+    """List the models found in the models directory."""
+    return {"models": sorted(discover_generators())}
+
 @app.get("/health")
 async def health_check():
     """Check if the API is running."""
@@ -0,0 +1,123 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+import generate_video
+from generate_video import FrameSource, FrameWriter, cartoonize_frames, open_frame_source
+
+class StubGenerator:
+    """Stands in for a CartoonGenerator: returns the frames unchanged and records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def cartoonize(self, images):
+        self.batches.append(len(images))
+        return [image.copy() for image in images]
+
+def make_frames(values):
+    return [np.full((8, 8, 3), value, dtype=np.uint8) for value in values]
+
+def run(values, **kwargs):
+    generator = StubGenerator()
+    stats = {}
+    outputs = list(cartoonize_frames(make_frames(values), generator, stats=stats, **kwargs))
+    return [int(output[0, 0, 0]) for output in outputs], generator.batches, stats
+
+def test_near_identical_frames_reuse_last_inferred_cartoon():
+    outputs, batches, stats = run([0, 0, 1, 100, 100], batch_size=4, diff_threshold=2.0)
+    assert outputs == [0, 0, 0, 100, 100]
+    assert batches == [2]
+    assert stats == {'frames': 5, 'inferred_frames': 2, 'reused_frames': 3}
+
+def test_frames_are_compared_with_last_inferred_frame_not_previous_one():
+    outputs, _, _ = run([0, 1, 2, 3], batch_size=4, diff_threshold=2.5)
+    assert outputs == [0, 0, 0, 3]
+
+def test_zero_threshold_infers_every_frame_in_batches():
+    outputs, batches, stats = run([5, 5, 5, 5, 5], batch_size=2, diff_threshold=0)
+    assert outputs == [5] * 5
+    assert batches == [2, 2, 1]
+    assert stats['reused_frames'] == 0
+
+def test_max_buffered_frames_flushes_and_reuses_across_flushes():
+    outputs, batches, stats = run([7] * 10 + [50], batch_size=4, max_buffered_frames=3)
+    assert outputs == [7] * 10 + [50]
+    assert batches == [1, 1]
+    assert stats['inferred_frames'] == 2
+
+def test_invalid_batching_is_rejected():
+    with pytest.raises(ValueError):
+        run([0], batch_size=0)
+
+class FakeEncoder:
+    """Stands in for the ffmpeg encoder subprocess."""
+
+    def __init__(self, returncode=0, broken_pipe=False):
+        self.stdin = io.BytesIO()
+        self.returncode = returncode
+        self.waited = False
+        if broken_pipe:
+            def close():
+                raise BrokenPipeError()
+            self.stdin.close = close
+
+    def wait(self):
+        self.waited = True
+        return self.returncode
+
+def make_ffmpeg_writer(monkeypatch, encoder):
+    monkeypatch.setattr(generate_video, "select_backend", lambda backend: "ffmpeg")
+    monkeypatch.setattr(FrameWriter, "_open", lambda self, width, height: setattr(self, "_process", encoder))
+    return FrameWriter("out.mp4", 30.0)
+
+def test_writer_rejects_frames_of_a_different_size(monkeypatch):
+    writer = make_ffmpeg_writer(monkeypatch, FakeEncoder())
+    writer.write(np.zeros((33, 47, 3), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((32, 47, 3), dtype=np.uint8))
+
+def test_writer_close_waits_for_encoder_after_broken_pipe(monkeypatch):
+    encoder = FakeEncoder(returncode=1, broken_pipe=True)
+    writer = make_ffmpeg_writer(monkeypatch, encoder)
+    writer.write(np.zeros((4, 4, 3), dtype=np.uint8))
+    with pytest.raises(RuntimeError):
+        writer.close()
+    assert encoder.waited
+
+def iter_frames():
+    yield np.zeros((4, 4, 3), dtype=np.uint8)
+
+def test_frame_source_releases_decoder_without_iterating():
+    released = []
+    source = FrameSource(25.0, iter_frames(), lambda: released.append(True))
+    source.close()
+    assert released == [True]
+
+def test_directory_source_reads_frames_in_name_order(tmp_path):
+    for value, name in [(20, "b.png"), (10, "a.png")]:
+        Image.fromarray(np.full((5, 7, 3), value, dtype=np.uint8)).save(tmp_path / name)
+    (tmp_path / "notes.txt").write_text("ignored")
+    source = open_frame_source(str(tmp_path), fps=12.0)
+    frames = list(source)
+    source.close()
+    assert source.fps == 12.0
+    assert [int(frame[0, 0, 0]) for frame in frames] == [10, 20]
+
+class FailingGenerator(StubGenerator):
+    """Fails on the second batch, once the encoder has been opened."""
+
+    def cartoonize(self, images):
+        if self.batches:
+            raise ValueError("inference failed")
+        return super().cartoonize(images)
+
+def test_encoder_close_error_does_not_hide_original_error(monkeypatch, tmp_path):
+    for value, name in [(0, "a.png"), (200, "b.png")]:
+        Image.fromarray(np.full((4, 4, 3), value, dtype=np.uint8)).save(tmp_path / name)
+    encoder = FakeEncoder(returncode=1)
+    make_ffmpeg_writer(monkeypatch, encoder)
+    monkeypatch.setattr(generate_video, "get_generator", lambda name, device=None: FailingGenerator())
+    with pytest.raises(RuntimeError, match="inference failed"):
+        generate_video.cartoonize_video(str(tmp_path), "out.mp4", batch_size=1)
+    assert encoder.waited
@@ -0,0 +1,99 @@
+import json
+import numpy as np
+import pytest
+import keras
+from generators import (CartoonGenerator, KerasModelGenerator, WeightsCheckpointGenerator,
+                        discover_generators, generator_from_file, generator_name)
+
+@pytest.mark.parametrize("stem, name", [
+    ("pix2pix_generator_model", "pix2pix"),
+    ("cyclic_gan_generator_g_model", "cyclic_gan"),
+    ("cyclic_gan_generator_f_model", "cyclic_gan_f"),
+    ("watercolor_generator", "watercolor"),
+    ("sketch_model", "sketch"),
+    ("generator_g_model", "generator_g"),
+    ("anime", "anime"),
+])
+def test_generator_name(stem, name):
+    assert generator_name(stem) == name
+
+def test_generator_from_file_picks_class_by_suffix(tmp_path):
+    keras_generator = generator_from_file(str(tmp_path / "pix2pix_generator_model.keras"))
+    weights_generator = generator_from_file(str(tmp_path / "cyclic_gan_generator_g_model.weights.h5"))
+    assert isinstance(keras_generator, KerasModelGenerator)
+    assert isinstance(weights_generator, WeightsCheckpointGenerator)
+    assert (keras_generator.name, weights_generator.name) == ("pix2pix", "cyclic_gan")
+    assert generator_from_file(str(tmp_path / "notes.txt")) is None
+
+def test_generator_from_file_reads_sidecar(tmp_path):
+    sidecar = {"name": "comic", "input_size": [512, 512], "resize_method": "area"}
+    (tmp_path / "style_generator_model.json").write_text(json.dumps(sidecar))
+    generator = generator_from_file(str(tmp_path / "style_generator_model.keras"))
+    assert generator.name == "comic"
+    assert generator.input_size == (512, 512)
+    assert generator.resize_method == "area"
+
+def test_discover_keeps_both_cyclegan_directions(tmp_path):
+    for file_name in ("cyclic_gan_generator_f_model.keras", "cyclic_gan_generator_g_model.keras"):
+        (tmp_path / file_name).touch()
+    generators = discover_generators(str(tmp_path))
+    assert generators["cyclic_gan"].path.endswith("cyclic_gan_generator_g_model.keras")
+    assert generators["cyclic_gan_f"].path.endswith("cyclic_gan_generator_f_model.keras")
+
+def test_discover_warns_on_name_collision(tmp_path, capsys):
+    (tmp_path / "pix2pix_generator_model.keras").touch()
+    (tmp_path / "pix2pix_model.keras").touch()
+    generators = discover_generators(str(tmp_path))
+    assert list(generators) == ["pix2pix"]
+    assert generators["pix2pix"].path.endswith("pix2pix_generator_model.keras")
+    assert "pix2pix_model.keras" in capsys.readouterr().out
+
+def test_incomplete_subclass_fails_on_creation():
+    class NoLoader(CartoonGenerator):
+        pass
+
+    with pytest.raises(TypeError):
+        NoLoader("broken", "broken.keras")
+
+def test_keras_generator_resizes_to_declared_input_size(tmp_path):
+    model = keras.Sequential([keras.Input((16, 16, 3)), keras.layers.Activation("linear")])
+    path = tmp_path / "tiny_generator_model.keras"
+    model.save(str(path))
+
+    generator = generator_from_file(str(path)).load()
+    assert generator.input_size == (16, 16)
+
+    # Larger than the declared size, like the 1024x1024 preprocess_image_for_inference output
+    batch = generator.fit_input(np.zeros((1, 64, 64, 3), dtype=np.float32))
+    assert tuple(batch.shape) == (1, 16, 16, 3)
+    output = generator.fit_output(generator.infer(batch), (64, 64))
+    assert tuple(output.shape) == (1, 64, 64, 3)
+
+    images = generator.cartoonize([np.full((20, 30, 3), 255, dtype=np.uint8)])
+    assert images[0].shape == (20, 30, 3)
+    assert images[0].dtype == np.uint8
+    assert images[0].min() == 255
+
+@pytest.mark.parametrize("sidecar", [
+    "{not json",
+    '["a list"]',
+    '{"input_sze": [256, 256]}',
+    '{"architecture": "unet_instancenorm"}',
+])
+def test_bad_sidecar_is_rejected(tmp_path, sidecar):
+    (tmp_path / "style_generator_model.json").write_text(sidecar)
+    with pytest.raises(ValueError):
+        generator_from_file(str(tmp_path / "style_generator_model.keras"))
+
+def test_unknown_architecture_is_rejected(tmp_path):
+    (tmp_path / "style_generator_model.json").write_text('{"architecture": "resnet"}')
+    with pytest.raises(ValueError):
+        generator_from_file(str(tmp_path / "style_generator_model.weights.h5"))
+
+def test_bad_sidecar_only_skips_its_own_model(tmp_path, capsys):
+    (tmp_path / "pix2pix_generator_model.keras").touch()
+    (tmp_path / "tiny_generator_model.keras").touch()
+    (tmp_path / "tiny_generator_model.json").write_text('{"architecture": "unet_instancenorm"}')
+    generators = discover_generators(str(tmp_path))
+    assert list(generators) == ["pix2pix"]
+    assert "tiny_generator_model.keras" in capsys.readouterr().out
@@ -1,44 +1,28 @@
-import tensorflow as tf
-from tensorflow_examples.models.pix2pix import pix2pix
+import os
+import sys
 import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
 
-# Define the same parameters as in Colab
-OUTPUT_CHANNELS = 3  # Confirm this matches your Colab
+# Reuse the backend's generator abstraction instead of rebuilding the model here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Backend files"))
+from generators import WeightsCheckpointGenerator
 
-# Rebuild the generator architecture
-generator_g = pix2pix.unet_generator(OUTPUT_CHANNELS, norm_type='instancenorm')
+# Weights-only checkpoint exported from Colab, rebuilt as the instance-norm U-Net.
+# Images are resized with Lanczos both ways, like PIL's Image.LANCZOS
+generator_g = WeightsCheckpointGenerator("cyclic_gan", 'generator_g_model.weights.h5',
+                                         architecture="unet_instancenorm", input_size=(256, 256),
+                                         resize_method='lanczos3', output_resize_method='lanczos3')
 
-# Load the weights
-generator_g.load_weights('generator_g_model.weights.h5')
-
-def load_and_preprocess_image(image_path, target_size=(256, 256)):
-    """Load and preprocess image for the model"""
-    img = Image.open(image_path)
-    img = img.resize(target_size, Image.LANCZOS)
-    img_array = np.array(img)
-
-    # Normalize to [-1, 1]
-    img_array = (img_array / 127.5) - 1.0
-    
-    # Add batch dimension
-    img_array = np.expand_dims(img_array, axis=0)
-    
-    return img_array
+def load_image(image_path):
+    """Load an image as an RGB uint8 array"""
+    return np.array(Image.open(image_path).convert("RGB"))
 
 
 def generate_and_display(image_path):
     """Generate transformed image and display results"""
-    # Load and preprocess
-    input_image = load_and_preprocess_image(image_path)
-    
-    # Generate transformed image
-    generated_image = generator_g(input_image, training=False)
-    
-    # Convert back to [0, 255]
-    generated_image = (generated_image[0].numpy() * 0.5 + 0.5) * 255.0
-    generated_image = generated_image.astype(np.uint8)
+    # Generate transformed image at the input resolution
+    generated_image = generator_g.cartoonize([load_image(image_path)])[0]
     
     # Load original for display
     original = Image.open(image_path)
@@ -62,23 +46,10 @@ def generate_and_display(image_path):
 
 def save_generated_image(image_path, output_path):
     """Generate and save the transformed image at original resolution"""
-    # Get original image size
-    original_img = Image.open(image_path)
-    original_size = original_img.size  # (width, height)
-    
-    # Preprocess for model
-    input_image = load_and_preprocess_image(image_path)
-    
-    # Generate
-    generated_image = generator_g(input_image, training=False)
-    
-    # Convert back to [0, 255]
-    generated_image = (generated_image[0].numpy() * 0.5 + 0.5) * 255.0
-    generated_image = generated_image.astype(np.uint8)
-    
-    # Create PIL image and resize back to original dimensions
+    # Generate; the result is resized back to the original dimensions
+    generated_image = generator_g.cartoonize([load_image(image_path)])[0]
     output_img = Image.fromarray(generated_image)
-    output_img = output_img.resize(original_size, Image.LANCZOS)
+    original_size = output_img.size  # (width, height)
 
     output_img.save(output_path)
     print(f"Saved generated image to: {output_path} (size: {original_size})")